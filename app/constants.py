@@ -0,0 +1,30 @@
+"""
+Lightweight shared constants with no heavy dependencies.
+
+The UI needs the location list for its selectbox before the user ever
+submits the form. Importing it from the graph modules would pull the whole
+LangGraph/LLM import chain into first paint, so the fallback weather table
+and the locations derived from it live here instead; the weather service
+imports them from this module.
+"""
+
+# Fallback data in case API call fails
+FALLBACK_WEATHER = {
+    "Delhi": {"temp_c": 35, "condition": "Sunny and Hot"},
+    "Mumbai": {"temp_c": 28, "condition": "Humid and Cloudy"},
+    "Bangalore": {"temp_c": 25, "condition": "Pleasant and Breezy"},
+    "Chennai": {"temp_c": 32, "condition": "Hot and Humid"},
+    "Kolkata": {"temp_c": 30, "condition": "Warm and Rainy"},
+    "Rajasthan": {"temp_c": 40, "condition": "Very Hot and Dry"},
+    "Kerala": {"temp_c": 29, "condition": "Tropical and Humid"},
+    "Pune": {"temp_c": 26, "condition": "Pleasant and Partly Cloudy"},
+    "Shimla": {"temp_c": 18, "condition": "Cool and Misty"},
+    "Patna": {"temp_c": 33, "condition": "Hot and Humid"},
+    "Dubai": {"temp_c": 38, "condition": "Very Hot and Dry"},
+    "Indore": {"temp_c": 28, "condition": "Warm and Clear"},
+    "Default": {"temp_c": 27, "condition": "Moderate"}
+}
+
+# Available locations (used for UI dropdown)
+AVAILABLE_LOCATIONS = list(FALLBACK_WEATHER.keys())
+AVAILABLE_LOCATIONS.remove("Default")  # Don't show 'Default' as an option in the UI
@@ -3,88 +3,161 @@ Tavily Weather Service Module
 Uses Tavily search API to fetch real-time weather data for locations
 """
 
+import asyncio
+import logging
 import os
 import requests
 import json
 import re
+import threading
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 
+# Optional fast JSON decoder: orjson is a C extension that is typically 2-3x
+# faster than the stdlib on medium payloads like Tavily search results.
+# Fall back to the stdlib json module if it isn't installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
+# Module logger - lazy %s formatting means arguments are only stringified
+# when the handler is actually enabled, unlike print() which always formats
+# and flushes stdout on the hot path
+logger = logging.getLogger(__name__)
+
 # Tavily API settings
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 TAVILY_SEARCH_URL = "https://api.tavily.com/search"
 
+# Shared HTTP session with keep-alive and connection pooling. Reusing one
+# session avoids a fresh TCP+TLS handshake on every weather fetch, and the
+# retry policy transparently backs off on rate limits and transient 5xx errors.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+# (connect, read) timeouts so a hung request can't stall the whole graph
+REQUEST_TIMEOUT = (3, 10)
+
 # Debug - print masked key to verify it's loaded (showing only first and last 2 chars)
 if TAVILY_API_KEY:
     masked_key = TAVILY_API_KEY[:2] + "*****" + TAVILY_API_KEY[-2:] if len(TAVILY_API_KEY) > 4 else "***"
-    print(f"Tavily API key loaded: {masked_key}")
+    logger.info("Tavily API key loaded: %s", masked_key)
 else:
-    print("No Tavily API key found in environment variables")
-
-# Fallback data in case API call fails
-FALLBACK_WEATHER = {
-    "Delhi": {"temp_c": 35, "condition": "Sunny and Hot"},
-    "Mumbai": {"temp_c": 28, "condition": "Humid and Cloudy"},
-    "Bangalore": {"temp_c": 25, "condition": "Pleasant and Breezy"},
-    "Chennai": {"temp_c": 32, "condition": "Hot and Humid"},
-    "Kolkata": {"temp_c": 30, "condition": "Warm and Rainy"},
-    "Rajasthan": {"temp_c": 40, "condition": "Very Hot and Dry"},
-    "Kerala": {"temp_c": 29, "condition": "Tropical and Humid"},
-    "Pune": {"temp_c": 26, "condition": "Pleasant and Partly Cloudy"},
-    "Shimla": {"temp_c": 18, "condition": "Cool and Misty"},
-    "Patna": {"temp_c": 33, "condition": "Hot and Humid"},
-    "Dubai": {"temp_c": 38, "condition": "Very Hot and Dry"},
-    "Indore": {"temp_c": 28, "condition": "Warm and Clear"},
-    "Default": {"temp_c": 27, "condition": "Moderate"}
-}
-
-# Available locations (used for UI dropdown)
-AVAILABLE_LOCATIONS = list(FALLBACK_WEATHER.keys())
-AVAILABLE_LOCATIONS.remove("Default")  # Don't show 'Default' as an option in the UI
+    logger.info("No Tavily API key found in environment variables")
+
+# Fallback weather table and the UI's location list live in app.constants so
+# the UI can import them without touching this module's HTTP machinery
+from app.constants import FALLBACK_WEATHER, AVAILABLE_LOCATIONS  # noqa: F401
+
+# TTL cache for weather lookups, keyed by location. Weather barely changes
+# within minutes, so repeated graph invocations (including the retry loop in
+# generate_outfit) can reuse the last Tavily result instead of going back over
+# HTTP. Guarded by a lock since Streamlit may serve sessions from threads.
+WEATHER_CACHE_TTL_SECONDS = 600  # 10 minutes
+_weather_cache: Dict[str, tuple] = {}  # location -> (timestamp, weather_data)
+_weather_cache_lock = threading.Lock()
+
+# Precompiled regexes for weather parsing.
+# Compiling once at import time avoids re-parsing the pattern strings (and the
+# re._compile cache lookup) on every extraction call - the hot path just runs
+# the already-built matchers.
+
+# Patterns like "25°C", "25 °C", "25 degrees Celsius"
+_CELSIUS_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(\d+(?:\.\d+)?)°C',  # 25°C
+    r'(\d+(?:\.\d+)?) °C',  # 25 °C
+    r'(\d+(?:\.\d+)?) degrees Celsius',  # 25 degrees Celsius
+    r'(\d+(?:\.\d+)?) Celsius',  # 25 Celsius
+    r'temperature (?:is|of) (\d+(?:\.\d+)?)',  # temperature is 25 or temperature of 25
+    r'(\d+(?:\.\d+)?) degrees'  # 25 degrees (assume Celsius)
+))
+
+# Fahrenheit variants, converted to Celsius after matching
+_FAHRENHEIT_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(\d+(?:\.\d+)?)°F',  # 77°F
+    r'(\d+(?:\.\d+)?) °F',  # 77 °F
+    r'(\d+(?:\.\d+)?) degrees Fahrenheit',  # 77 degrees Fahrenheit
+    r'(\d+(?:\.\d+)?) Fahrenheit'  # 77 Fahrenheit
+))
+
+# Common weather condition keywords to look for
+_CONDITION_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(sunny|clear sky|clear)',
+    r'(cloudy|overcast|cloud cover)',
+    r'(rainy|raining|rain shower|light rain|heavy rain)',
+    r'(snowy|snowing|snow shower|light snow|heavy snow)',
+    r'(foggy|misty|hazy)',
+    r'(stormy|thunderstorm|thunder|lightning)',
+    r'(windy|strong winds|gusts)',
+    r'(humid|humidity|muggy)',
+    r'(dry|arid)',
+    r'(hot|warm|pleasant|cool|cold|chilly|freezing)'
+))
+
+# Sentences mentioning the weather, used as a last-resort condition description
+_WEATHER_SENTENCE_RE = re.compile(r'[^.!?]*(?:weather|condition)[^.!?]*[.!?]', re.IGNORECASE)
+
+# Cap on how much text the sentence fallback scans: it only runs when the
+# keyword patterns found nothing, and an unexpectedly large search blob
+# shouldn't be allowed to blow up parse latency
+_SENTENCE_SCAN_LIMIT = 4096
+
+# Single fused alternation combining every temperature and condition pattern.
+# parse_weather_from_search_results scans the concatenated result text once
+# with this regex instead of running each pattern above over the full text,
+# dispatching on the named group that matched (m.lastgroup). Group names
+# starting with "c" are Celsius readings, "f" Fahrenheit, "cond" a condition
+# keyword. The bare "N degrees" form keeps its historical Celsius priority
+# over the explicit Fahrenheit spellings.
+_FUSED_WEATHER_RE = re.compile(
+    r'(?P<c1>\d+(?:\.\d+)?)\s*°\s*C'
+    r'|(?P<c2>\d+(?:\.\d+)?) Celsius'
+    r'|temperature (?:is|of) (?P<c3>\d+(?:\.\d+)?)'
+    r'|(?P<c4>\d+(?:\.\d+)?) degrees'
+    r'|(?P<f1>\d+(?:\.\d+)?)\s*°\s*F'
+    r'|(?P<f2>\d+(?:\.\d+)?) Fahrenheit'
+    r'|(?P<cond>sunny|clear sky|clear|cloudy|overcast|cloud cover'
+    r'|rainy|raining|rain shower|light rain|heavy rain'
+    r'|snowy|snowing|snow shower|light snow|heavy snow'
+    r'|foggy|misty|hazy|stormy|thunderstorm|thunder|lightning'
+    r'|windy|strong winds|gusts|humid|humidity|muggy|dry|arid'
+    r'|hot|warm|pleasant|cool|cold|chilly|freezing)',
+    re.IGNORECASE
+)
 
 def extract_temperature(text: str) -> Optional[float]:
     """
     Extracts temperature values from text.
     Looks for patterns like "XX°C", "XX degrees Celsius", etc.
-    
+
     Args:
         text: Text containing temperature information
-        
+
     Returns:
         Temperature in Celsius if found, None otherwise
     """
-    # Look for patterns like "25°C", "25 °C", "25 degrees Celsius"
-    celsius_patterns = [
-        r'(\d+(?:\.\d+)?)°C',  # 25°C
-        r'(\d+(?:\.\d+)?) °C',  # 25 °C
-        r'(\d+(?:\.\d+)?) degrees Celsius',  # 25 degrees Celsius
-        r'(\d+(?:\.\d+)?) Celsius',  # 25 Celsius
-        r'temperature (?:is|of) (\d+(?:\.\d+)?)',  # temperature is 25 or temperature of 25
-        r'(\d+(?:\.\d+)?) degrees'  # 25 degrees (assume Celsius)
-    ]
-    
-    for pattern in celsius_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for regex in _CELSIUS_RES:
+        match = regex.search(text)
         if match:
             try:
                 return float(match.group(1))
             except ValueError:
                 continue
-    
+
     # If no Celsius temperature found, try Fahrenheit and convert
-    fahrenheit_patterns = [
-        r'(\d+(?:\.\d+)?)°F',  # 77°F
-        r'(\d+(?:\.\d+)?) °F',  # 77 °F
-        r'(\d+(?:\.\d+)?) degrees Fahrenheit',  # 77 degrees Fahrenheit
-        r'(\d+(?:\.\d+)?) Fahrenheit'  # 77 Fahrenheit
-    ]
-    
-    for pattern in fahrenheit_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for regex in _FAHRENHEIT_RES:
+        match = regex.search(text)
         if match:
             try:
                 fahrenheit = float(match.group(1))
@@ -105,33 +178,48 @@ def extract_weather_condition(text: str) -> Optional[str]:
     Returns:
         Weather condition description if found, None otherwise
     """
-    # Common weather condition keywords to look for
-    condition_patterns = [
-        r'(sunny|clear sky|clear)',
-        r'(cloudy|overcast|cloud cover)',
-        r'(rainy|raining|rain shower|light rain|heavy rain)',
-        r'(snowy|snowing|snow shower|light snow|heavy snow)',
-        r'(foggy|misty|hazy)',
-        r'(stormy|thunderstorm|thunder|lightning)',
-        r'(windy|strong winds|gusts)',
-        r'(humid|humidity|muggy)',
-        r'(dry|arid)',
-        r'(hot|warm|pleasant|cool|cold|chilly|freezing)'
-    ]
-    
     # Look for weather condition descriptions
-    for pattern in condition_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for regex in _CONDITION_RES:
+        match = regex.search(text)
         if match:
             return match.group(0).capitalize()
-    
-    # If no specific condition found, look for sentences containing "weather"
-    weather_sentences = re.findall(r'[^.!?]*(?:weather|condition)[^.!?]*[.!?]', text, re.IGNORECASE)
-    if weather_sentences:
-        return weather_sentences[0].strip()
-    
+
+    # If no specific condition found, look for a sentence containing
+    # "weather" - only reached when every keyword pattern missed, and capped
+    # so the scan can't run away on a huge blob. search() stops at the first
+    # sentence instead of collecting every match like findall.
+    match = _WEATHER_SENTENCE_RE.search(text[:_SENTENCE_SCAN_LIMIT])
+    if match:
+        return match.group(0).strip()
+
     return None
 
+def _scan_weather_text(text: str) -> tuple:
+    """
+    Single fused-regex pass over text, returning (temp_c, condition).
+
+    Takes the first temperature hit and the first condition hit, stopping
+    as soon as both are filled. Either element may be None.
+    """
+    temp_c = None
+    condition = None
+    for match in _FUSED_WEATHER_RE.finditer(text):
+        group = match.lastgroup
+        if group == "cond":
+            if condition is None:
+                condition = match.group(group).capitalize()
+        elif temp_c is None:
+            try:
+                value = float(match.group(group))
+            except ValueError:
+                continue
+            if group.startswith("f"):
+                value = round((value - 32) * 5 / 9, 1)
+            temp_c = value
+        if temp_c is not None and condition is not None:
+            break
+    return temp_c, condition
+
 def parse_weather_from_search_results(search_results: Dict[str, Any], location: str) -> Dict[str, Any]:
     """
     Parses weather information from Tavily search results.
@@ -143,20 +231,34 @@ def parse_weather_from_search_results(search_results: Dict[str, Any], location:
     Returns:
         Dictionary with parsed weather information
     """
-    # Extract content from search results
+    # Tavily's summarized "answer" field is short and usually contains the
+    # temperature and condition directly, so scan it first and only fall back
+    # to the (much longer) concatenated result contents if something is missing
+    temp_c, condition = _scan_weather_text(search_results.get("answer") or "")
+
     all_text = ""
-    if "results" in search_results:
-        for result in search_results["results"]:
-            if "content" in result:
-                all_text += result["content"] + " "
-    
-    # Extract temperature and condition
-    temp_c = extract_temperature(all_text)
-    condition = extract_weather_condition(all_text)
-    
+    if temp_c is None or condition is None:
+        # join() builds the concatenated text in one allocation instead of
+        # the O(N^2) reallocation pattern of repeated str +=
+        all_text = " ".join(
+            result["content"] for result in search_results.get("results", [])
+            if "content" in result
+        )
+        content_temp, content_condition = _scan_weather_text(all_text)
+        temp_c = temp_c if temp_c is not None else content_temp
+        condition = condition if condition is not None else content_condition
+
+    # If no condition keyword matched, look for a sentence containing
+    # "weather" (capped, first hit only - see extract_weather_condition)
+    if condition is None:
+        match = _WEATHER_SENTENCE_RE.search(all_text[:_SENTENCE_SCAN_LIMIT])
+        if match:
+            condition = match.group(0).strip()
+
+
     # If we couldn't extract temperature or condition, use fallback
     if temp_c is None or condition is None:
-        print(f"Warning: Couldn't extract complete weather data for {location} from Tavily results. Using fallback data.")
+        logger.warning("Couldn't extract complete weather data for %s from Tavily results. Using fallback data.", location)
         fallback = FALLBACK_WEATHER.get(location, FALLBACK_WEATHER["Default"])
         
         # Use extracted values if available, fallback otherwise
@@ -181,15 +283,22 @@ def get_weather_for_location(location: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing temperature and condition
     """
+    # Serve from the TTL cache if we fetched this location recently
+    with _weather_cache_lock:
+        cached = _weather_cache.get(location)
+        if cached and time.time() - cached[0] < WEATHER_CACHE_TTL_SECONDS:
+            logger.info("Using cached weather data for %s", location)
+            return cached[1]
+
     # Early return if API key not set
     if not TAVILY_API_KEY:
-        print("Warning: Tavily API key not set. Using fallback data.")
+        logger.warning("Tavily API key not set. Using fallback data.")
         return FALLBACK_WEATHER.get(location, FALLBACK_WEATHER["Default"])
-    
+
     try:
         # Construct search query for current weather
         search_query = f"current weather in {location} temperature celsius"
-        print(f"Searching for: '{search_query}'")
+        logger.info("Searching for: '%s'", search_query)
         
         # Prepare API request - Using different header format per Tavily API docs
         headers = {
@@ -197,25 +306,38 @@ def get_weather_for_location(location: str) -> Dict[str, Any]:
             "Authorization": f"Bearer {TAVILY_API_KEY}"  # Changed from X-Api-Key to Authorization: Bearer
         }
         
+        # A basic-depth search with two results is enough for a simple
+        # "current temperature" query - the summarized "answer" field alone
+        # usually satisfies the parser - and it keeps Tavily latency and
+        # payload size down compared to an advanced five-result search
         payload = {
             "query": search_query,
-            "search_depth": "advanced",
+            "search_depth": "basic",
             "include_domains": ["weather.com", "accuweather.com", "weatherapi.com", "timeanddate.com", "bbc.com", "cnn.com"],
             "include_answer": True,
-            "max_results": 5
+            "max_results": 2
         }
         
         # Make API request
-        print(f"Making request to {TAVILY_SEARCH_URL}")
-        response = requests.post(TAVILY_SEARCH_URL, json=payload, headers=headers)
+        logger.info("Making request to %s", TAVILY_SEARCH_URL)
+        response = _SESSION.post(TAVILY_SEARCH_URL, json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
         
         # Check if request was successful
         if response.status_code == 200:
-            search_results = response.json()
-            print(f"Successfully received response from Tavily")
+            # Decode from the raw bytes so orjson can be used when available
+            if orjson is not None:
+                search_results = orjson.loads(response.content)
+            else:
+                search_results = json.loads(response.content)
+            logger.info("Successfully received response from Tavily")
             
             # Parse weather information from search results
             weather_data = parse_weather_from_search_results(search_results, location)
+
+            # Cache the successful result so near-term lookups skip the API
+            with _weather_cache_lock:
+                _weather_cache[location] = (time.time(), weather_data)
+
             return weather_data
         else:
             # Print more detailed error information
@@ -225,13 +347,27 @@ def get_weather_for_location(location: str) -> Dict[str, Any]:
             except:
                 pass
                 
-            print(f"Tavily API error: {response.status_code}. Details: {error_detail}. Using fallback data.")
+            logger.warning("Tavily API error: %s. Details: %s. Using fallback data.", response.status_code, error_detail)
             return FALLBACK_WEATHER.get(location, FALLBACK_WEATHER["Default"])
             
     except Exception as e:
-        print(f"Error fetching weather data: {str(e)}. Using fallback data.")
+        logger.warning("Error fetching weather data: %s. Using fallback data.", e)
         return FALLBACK_WEATHER.get(location, FALLBACK_WEATHER["Default"])
 
+async def aget_weather_for_location(location: str) -> Dict[str, Any]:
+    """
+    Async entry point for the weather fetch.
+
+    The graph nodes are async, and blocking on the Tavily round-trip would
+    stall the whole event loop (and with it any node that could run in
+    parallel, e.g. prompt preparation). The sync implementation stays
+    requests-based; running it in a worker thread is enough to let the event
+    loop overlap it with other I/O.
+    """
+    import asyncio
+
+    return await asyncio.to_thread(get_weather_for_location, location)
+
 # Test function
 if __name__ == "__main__":
     test_locations = ["Delhi", "Mumbai", "Bangalore", "New York"]
@@ -16,19 +16,50 @@ Key Streamlit concepts used:
 """
 
 import streamlit as st
+import asyncio
+import collections
 import sys
 import os
 
+from dotenv import load_dotenv, set_key
+
 # Add the parent directory to sys.path to allow imports from graph.py
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
+# Load .env once per process so os.getenv sees persisted keys
+load_dotenv()
+
 # --- Initialize Session State ---
 # Streamlit's session state maintains data across interactions
 # This is crucial for multi-step workflows like our outfit recommender
 
+def _log_text():
+    """Join the log for display, reusing the cached join while it is unchanged."""
+    log = st.session_state.log
+    cached = st.session_state.get("_log_text_cache")
+    key = (len(log), log[-1] if log else None)
+    if cached is None or cached[0] != key:
+        cached = (key, "\n".join(log))
+        st.session_state._log_text_cache = cached
+    return cached[1]
+
+def _reset_session(processing=False, initial_log="👋 Welcome! Fill in your details to get started."):
+    """Reset the per-run session fields in one dict.update call."""
+    st.session_state.update({
+        "processing": processing,
+        "recommendation": None,
+        "result_message": None,
+        "rating": 0,
+        "rating_submitted": False,
+        "waiting_for_rating": False,
+        "attempts": 0,
+        "graph_state": {},
+        "log": collections.deque([initial_log], maxlen=200),
+    })
+
 def initialize_session_state():
     """Initialize all session state variables with default values."""
     defaults = {
@@ -37,17 +68,19 @@ def initialize_session_state():
         "rating": 0,                           # User's rating for current recommendation
         "rating_submitted": False,             # Has user submitted rating?
         "attempts": 0,                         # Number of attempts made
-        "log": ["👋 Welcome! Fill in your details to get started."],  # Execution log
+        # Execution log: a bounded deque so a long retry session appends in
+        # O(1) and never grows (or gets copied) without limit
+        "log": collections.deque(["👋 Welcome! Fill in your details to get started."], maxlen=200),
         "result_message": None,                # Final success/failure message
         "graph_state": {},                     # The LangGraph state object
         "run_key": 0,                         # Unique key for each run (prevents UI conflicts)
         "waiting_for_rating": False,          # Is UI waiting for user rating?
     }
     
-    # Only set if not already present (preserves existing values)
+    # setdefault preserves existing values with a single dict operation per
+    # key instead of a membership check followed by a store
     for key, default_value in defaults.items():
-        if key not in st.session_state:
-            st.session_state[key] = default_value
+        st.session_state.setdefault(key, default_value)
 
 # Initialize session state
 initialize_session_state()
@@ -76,96 +109,107 @@ st.divider()
 
 # Try to import graph components
 try:
-    # Import from our fixed_graph module
-    from app.fixed_graph import app, OutfitState, AVAILABLE_LOCATIONS
+    # Only the lightweight constants are needed for first paint; the graph
+    # itself (LangGraph, LLM SDK) is imported lazily once processing starts
+    from app.constants import AVAILABLE_LOCATIONS
+
+    @st.cache_resource
+    def get_graph_app():
+        """
+        Import and hold the compiled LangGraph app for the process lifetime.
+
+        cache_resource guarantees the graph (LLM client, compiled workflow)
+        is constructed once and shared across every session and rerun, and
+        keeps the heavy fixed_graph import chain off reruns that happen
+        before it's needed.
+        """
+        from app.fixed_graph import app
+        return app
 
     # --- Constants even if graph fails ---
     MAX_ATTEMPTS = 5
-    INDIAN_STATES = AVAILABLE_LOCATIONS
-    GENDERS = ["Male", "Female", "Other"]
-    OCCASIONS = ["Party", "Date", "Formal", "Daily Casual", "Vacation"]
-    MOODS = ["Confident", "Minimal", "Romantic", "Bold", "Relaxed", "Streetwear"]
+
+    from types import SimpleNamespace
+
+    @st.cache_resource
+    def _ui_constants():
+        """
+        Widget option lists and default indices, built once per process.
+
+        Streamlit reruns the whole script on each interaction; cache_resource
+        keeps these (including the O(N) default-location index scan) from
+        being rebuilt every rerun.
+        """
+        states = AVAILABLE_LOCATIONS
+        return SimpleNamespace(
+            states=states,
+            genders=["Male", "Female", "Other"],
+            occasions=["Party", "Date", "Formal", "Daily Casual", "Vacation"],
+            moods=["Confident", "Minimal", "Romantic", "Bold", "Relaxed", "Streetwear"],
+            default_location_idx=states.index("Bangalore") if "Bangalore" in states else 0,
+            default_occasion_idx=3,  # Daily Casual
+            default_mood_idx=4,      # Relaxed
+        )
+
+    ui_consts = _ui_constants()
 
     # --- UI Layout ---
     col1, col2 = st.columns([1, 1.5])
 
     with col1:
-        st.header("Step 1: Your Details")
-        height = st.text_input("Height (e.g., 5'10\", 170cm)", "5'10\"")
-        gender = st.selectbox("Gender", GENDERS, index=0)
-
-        st.header("Step 2: Context")
-        location = st.selectbox("Location (Indian State)", INDIAN_STATES, index=INDIAN_STATES.index("Bangalore") if "Bangalore" in INDIAN_STATES else 0)
-        occasion = st.selectbox("Occasion", OCCASIONS, index=3)  # Default to Daily Casual
-        mood = st.selectbox("Desired Mood", MOODS, index=4)  # Default to Relaxed
-
-        # API key input
-        with st.expander("Tavily API Settings"):
-            tavily_key = st.text_input(
-                "Tavily API Key", 
-                value=os.getenv("TAVILY_API_KEY", ""),
-                type="password",
-                help="Required for real-time weather data via Tavily's search API"
-            )
-            
-            if tavily_key:
-                # Save to .env file
-                env_path = os.path.join(parent_dir, ".env")
-                try:
-                    # Read existing content first
-                    env_content = ""
-                    if os.path.exists(env_path):
-                        with open(env_path, "r") as f:
-                            env_content = f.read()
-                    
-                    # Check if we need to update or add
-                    if "TAVILY_API_KEY=" in env_content:
-                        # Update existing key
-                        lines = env_content.split("\n")
-                        new_lines = []
-                        for line in lines:
-                            if line.startswith("TAVILY_API_KEY="):
-                                new_lines.append(f"TAVILY_API_KEY={tavily_key}")
-                            else:
-                                new_lines.append(line)
-                        updated_content = "\n".join(new_lines)
-                    else:
-                        # Add new key
-                        if env_content and not env_content.endswith("\n"):
-                            env_content += "\n"
-                        updated_content = f"{env_content}TAVILY_API_KEY={tavily_key}\n"
-                    
-                    # Write back
-                    with open(env_path, "w") as f:
-                        f.write(updated_content)
-                    
-                    # Set environment variable for current session
-                    os.environ["TAVILY_API_KEY"] = tavily_key
-                    
-                except Exception as e:
-                    st.warning(f"Could not save API key to .env file: {e}")
-            
-            # Add info about data source
-            st.info("ℹ️ Tavily Search API will be used to search for real-time weather data. If the API key is not provided, fallback data will be used.")
+        # A form batches all the input widgets into a single rerun on submit;
+        # without it, every keystroke or selectbox change re-executes the
+        # whole script just to update one local variable.
+        with st.form("recommend_form"):
+            st.header("Step 1: Your Details")
+            height = st.text_input("Height (e.g., 5'10\", 170cm)", "5'10\"")
+            gender = st.selectbox("Gender", ui_consts.genders, index=0)
 
-        # Action button for starting the process
-        button_disabled = st.session_state.processing or st.session_state.result_message is not None
-        
-        if st.button("✨ Get Outfit Recommendation", 
+            st.header("Step 2: Context")
+            location = st.selectbox("Location (Indian State)", ui_consts.states, index=ui_consts.default_location_idx)
+            occasion = st.selectbox("Occasion", ui_consts.occasions, index=ui_consts.default_occasion_idx)
+            mood = st.selectbox("Desired Mood", ui_consts.moods, index=ui_consts.default_mood_idx)
+
+            # API key input
+            with st.expander("Tavily API Settings"):
+                tavily_key = st.text_input(
+                    "Tavily API Key", 
+                    value=os.getenv("TAVILY_API_KEY", ""),
+                    type="password",
+                    help="Required for real-time weather data via Tavily's search API"
+                )
+                
+                # Add info about data source
+                st.info("ℹ️ Tavily Search API will be used to search for real-time weather data. If the API key is not provided, fallback data will be used.")
+
+            # Action button for starting the process
+            button_disabled = st.session_state.processing or st.session_state.result_message is not None
+            
+            submitted = st.form_submit_button("✨ Get Outfit Recommendation", 
                     use_container_width=True, 
                     type="primary",
-                    disabled=button_disabled):
+                    disabled=button_disabled)
+
+        # Persist the key only on submit, and only when it actually changed
+        # this session: the form means no mid-typing reruns, and set_key
+        # updates the single line in one library call instead of re-reading
+        # and rewriting the whole file.
+        if submitted and tavily_key and st.session_state.get("_tavily_key_cached") != tavily_key:
+            env_path = os.path.join(parent_dir, ".env")
+            try:
+                set_key(env_path, "TAVILY_API_KEY", tavily_key)
+
+                # Set environment variable for current session
+                os.environ["TAVILY_API_KEY"] = tavily_key
+                st.session_state["_tavily_key_cached"] = tavily_key
+
+            except Exception as e:
+                st.warning(f"Could not save API key to .env file: {e}")
+
+        if submitted and not button_disabled:
             
             # Reset state
-            st.session_state.processing = True
-            st.session_state.recommendation = None
-            st.session_state.result_message = None
-            st.session_state.rating = 0
-            st.session_state.rating_submitted = False
-            st.session_state.waiting_for_rating = False
-            st.session_state.attempts = 0
-            st.session_state.log = ["Starting new recommendation process..."]
-            st.session_state.graph_state = {}
+            _reset_session(processing=True, initial_log="Starting new recommendation process...")
             st.session_state.run_key += 1
             
             # Create initial state for the graph (notice the key is result_message instead of final_message)
@@ -178,7 +222,7 @@ try:
                 "rating": 0,
                 "attempts": 0,
                 "max_attempts": MAX_ATTEMPTS,
-                "log": st.session_state.log[:],
+                "log": list(st.session_state.log),  # one copy per run, not per event
                 "weather": {},
                 "recommendation": "",
                 "result_message": ""  # Changed from final_message to result_message
@@ -198,15 +242,7 @@ try:
             
             # Add a restart button
             if st.button("Start Over", use_container_width=True):
-                st.session_state.processing = False
-                st.session_state.recommendation = None
-                st.session_state.result_message = None
-                st.session_state.rating = 0
-                st.session_state.rating_submitted = False
-                st.session_state.waiting_for_rating = False
-                st.session_state.attempts = 0
-                st.session_state.log = ["Welcome! Fill in your details to get started."]
-                st.session_state.graph_state = {}
+                _reset_session(initial_log="Welcome! Fill in your details to get started.")
                 st.rerun()
         elif st.session_state.waiting_for_rating and st.session_state.recommendation:
             # Show the recommendation and wait for rating
@@ -225,13 +261,26 @@ try:
             # Show live log if available
             if st.session_state.log:
                 with st.expander("View Process Log"):
-                    st.text_area("Process Steps:", value="\n".join(st.session_state.log), height=200, key=f"log_waiting_{st.session_state.run_key}")
+                    st.text_area("Process Steps:", value=_log_text(), height=200, key=f"log_waiting_{st.session_state.run_key}")
         else:
             st.header("Output will appear here")
             st.info("Fill out the form and click the recommendation button to get started.")
     
     # --- Processing Logic (only runs if processing flag is set) ---
-    if st.session_state.processing and not st.session_state.result_message and not st.session_state.waiting_for_rating:
+    # Wrapped in a fragment so graph events only re-execute this block, not
+    # the whole script: a full-script rerun would rebuild every widget above
+    # (form inputs, selectboxes, the API-key expander) on each node emission.
+    # st.fragment became a stable API in Streamlit 1.37; the pinned 1.34
+    # ships the same decorator as st.experimental_fragment.
+    _fragment = st.fragment if hasattr(st, "fragment") else st.experimental_fragment
+
+    @_fragment
+    def run_graph_fragment():
+        # Guard inside the fragment so fragment-scoped reruns after the
+        # rating pause fall through without re-entering the stream
+        if not st.session_state.processing or st.session_state.result_message or st.session_state.waiting_for_rating:
+            return
+
         st.info("Processing your request...")
         
         # Prepare initial state if it's the first attempt
@@ -251,51 +300,90 @@ try:
         # Process the graph (either initial run or continuation after rating)
         # Use None config for simplicity - the graph will use default settings
         config = None
+
+        # First use pays the fixed_graph import; afterwards this is a cache hit
+        graph_app = get_graph_app()
         
         # Placeholders for dynamic content
         with col2:
             log_placeholder = st.empty()
             result_placeholder = st.empty()
         
-        try:
-            # Stream events from the graph
-            with st.spinner("Running recommendation engine..."):
-                stream = app.stream(st.session_state.graph_state, config=config)
-                for event in stream:
-                    node_name = list(event.keys())[0]
-                    node_output = event[node_name]
-                    
-                    # Update the state
-                    st.session_state.graph_state.update(node_output)
-                    
-                    # Update session state convenience variables
-                    if 'log' in node_output:
-                        st.session_state.log = node_output['log']
-                    if 'recommendation' in node_output:
-                        st.session_state.recommendation = node_output['recommendation']
-                    if 'attempts' in node_output:
-                        st.session_state.attempts = node_output['attempts']
-                    if 'result_message' in node_output:  # Changed from final_message to result_message
-                        st.session_state.result_message = node_output['result_message']
-                    
-                    # Update the UI
+        async def stream_graph_events(graph_state, run_config):
+            """
+            Drive the async graph (graph_app.astream) and render each event
+            as it arrives.
+
+            The graph nodes are async (see fixed_graph.py), so we stream them
+            on an asyncio event loop. The coroutine itself runs on the script
+            thread, so Streamlit calls are safe in here - and rendering per
+            event keeps the live log actually live, instead of first painting
+            after the whole weather+LLM run has finished. We stop consuming
+            as soon as a recommendation is produced - the UI pauses there to
+            ask the user for a rating, exactly like the old sync-stream
+            early exit.
+            """
+            rendered_lines = 0
+            async for event in graph_app.astream(graph_state, config=run_config):
+                node_name = list(event.keys())[0]
+                node_output = event[node_name]
+
+                # Update the state
+                st.session_state.graph_state.update(node_output)
+
+                # Update session state convenience variables
+                if 'log' in node_output:
+                    # Nodes emit only their new log entries (the graph's log
+                    # reducer is additive), so extend in place rather than
+                    # rebuilding the list; the graph state keeps a plain
+                    # list (bounded by the deque's maxlen) for re-invokes
+                    st.session_state.log.extend(node_output['log'])
+                    st.session_state.graph_state['log'] = list(st.session_state.log)
+                if 'recommendation' in node_output:
+                    st.session_state.recommendation = node_output['recommendation']
+                if 'attempts' in node_output:
+                    st.session_state.attempts = node_output['attempts']
+                if 'result_message' in node_output:  # Changed from final_message to result_message
+                    st.session_state.result_message = node_output['result_message']
+
+                # Update the UI only when new log lines actually arrived,
+                # and render a plain element into the placeholder. The old
+                # per-event text_area with a fresh key forced Streamlit to
+                # instantiate (and ship) a brand-new widget on every node
+                # tick; st.code is diffed in place instead.
+                if len(st.session_state.log) != rendered_lines:
+                    rendered_lines = len(st.session_state.log)
                     with log_placeholder.container():
                         st.header("📝 Live Log")
-                        st.text_area("Process Steps:", value="\n".join(st.session_state.log), height=300, key=f"log_{st.session_state.run_key}_{st.session_state.attempts}")
-                    
-                    # If we got a recommendation, pause and wait for rating
-                    if node_name == "generate_outfit" and st.session_state.recommendation:
-                        st.session_state.waiting_for_rating = True
-                        st.rerun()  # Rerun to show the rating UI
-                    
-                    # Show final message if available
-                    if st.session_state.result_message:
-                        with result_placeholder.container():
-                            st.header("🏁 Final Result")
-                            st.success(st.session_state.result_message)
-                        st.session_state.processing = False
-                        st.rerun()  # Rerun to update UI state
-            
+                        st.code(_log_text(), language=None)
+
+                # If we got a recommendation, pause and wait for rating.
+                # Break out cleanly instead of rerunning mid-iteration:
+                # session state is already persisted, so the loop can be
+                # torn down normally and the rating UI requested once at
+                # the end of the fragment.
+                if node_name == "generate_outfit" and st.session_state.recommendation:
+                    st.session_state.waiting_for_rating = True
+                    break
+
+                # Show final message if available
+                if st.session_state.result_message:
+                    with result_placeholder.container():
+                        st.header("🏁 Final Result")
+                        st.success(st.session_state.result_message)
+                    st.session_state.processing = False
+                    st.rerun()  # Rerun to update UI state
+
+        try:
+            # Stream events from the graph, rendering as they arrive
+            with st.spinner("Running recommendation engine..."):
+                asyncio.run(stream_graph_events(st.session_state.graph_state, config))
+
+            # Paused for a rating: one full rerun after the stream has been
+            # cleanly consumed renders the rating branch in the main column
+            if st.session_state.waiting_for_rating:
+                st.rerun()
+
             # If the stream ends without a final message
             if not st.session_state.result_message:
                 st.warning("Process completed but no final message was generated.")
@@ -305,7 +393,9 @@ try:
             st.error(f"An error occurred during processing: {e}")
             st.session_state.log.append(f"ERROR: {e}")
             st.session_state.processing = False
-        
+
+    run_graph_fragment()
+
 except Exception as e:
     st.error(f"Critical application error: {e}")
     st.exception(e)  # Show the full traceback for debugging
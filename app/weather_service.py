@@ -3,10 +3,14 @@ Weather Service Module
 Provides functions to fetch real weather data from OpenWeatherMap API
 """
 
+import bisect
+import logging
 import os
 import requests
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 
 # Load environment variables
@@ -16,6 +20,47 @@ load_dotenv()
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
 
+# Module logger: unlike print, a disabled logger call is a cheap level check
+# with no string formatting or stdout write on the fallback path. NullHandler
+# keeps the module silent unless the embedding app configures logging.
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Cache TTL shared by every layer: OpenWeather refreshes roughly every 10
+# minutes, so anything fresher is a wasted fetch
+_CACHE_TTL_SECONDS = 600
+
+# Shared HTTP session with keep-alive and connection pooling: repeated
+# lookups reuse the same TCP/TLS connection instead of paying a fresh
+# handshake (~2-4 RTT) on every call. The retry policy backs off on
+# transient server errors only; 4xx responses fall straight through to the
+# fallback path without retries or JSON decoding.
+#
+# When requests-cache is installed, the session additionally serves repeat
+# URLs from a local sqlite store, skipping the network round-trip and the
+# JSON decode even across process restarts (the in-process cache below only
+# covers a single run). Plain Session if the package isn't available.
+try:
+    from requests_cache import CachedSession
+    _session = CachedSession(
+        cache_name=".weather_cache", backend="sqlite",
+        expire_after=_CACHE_TTL_SECONDS, allowable_methods=("GET",),
+    )
+except ImportError:
+    _session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(
+        total=2, backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=("GET",),
+    ),
+))
+
+# (connect, read) timeouts: bound the worst-case wall time per fetch so a
+# slow DNS lookup or hung server can't stall the Streamlit script thread
+REQUEST_TIMEOUT = (1.0, 3.0)
+
 # Fallback data in case API call fails
 FALLBACK_WEATHER = {
     "Delhi": {"temp_c": 35, "condition": "Sunny and Hot"},
@@ -28,6 +73,13 @@ FALLBACK_WEATHER = {
     "Default": {"temp_c": 27, "condition": "Moderate"}
 }
 
+# Negative cache: locations the API recently rejected (e.g. 404 for state
+# names with no OpenWeather city mapping). Retrying them every call just
+# burns a network round-trip and JSON decode to reach the same fallback, so
+# failures short-circuit straight to the fallback for an hour.
+_NEGATIVE_CACHE_TTL_SECONDS = 3600
+_negative_cache: Dict[str, float] = {}  # location -> time of last failure
+
 # Mapping of Indian states to major cities for weather lookup
 STATE_TO_CITY = {
     "Delhi": "Delhi",
@@ -44,6 +96,15 @@ def kelvin_to_celsius(kelvin: float) -> float:
     """Convert temperature from Kelvin to Celsius."""
     return kelvin - 273.15
 
+# Temperature/humidity buckets for get_condition_description. A single
+# bisect_right (one C-level binary search) replaces the old cascade of
+# Python-level comparisons on every weather fetch.
+_TEMP_CUTS = (10, 15, 20, 25, 30, 35)
+_TEMP_LABELS = ("Very Cold", "Cold", "Cool", "Pleasant", "Warm", "Hot", "Very Hot")
+# Humidity is an integer percentage, so the "" bucket covers 30..80 inclusive
+_HUMIDITY_CUTS = (30, 81)
+_HUMIDITY_LABELS = (" and Dry", "", " and Humid")
+
 def get_condition_description(weather_data: Dict[str, Any]) -> str:
     """Generate a human-friendly condition description from weather data."""
     if not weather_data or "weather" not in weather_data:
@@ -56,50 +117,38 @@ def get_condition_description(weather_data: Dict[str, Any]) -> str:
         temp = kelvin_to_celsius(weather_data["main"]["temp"])
         
         # Create human-readable condition based on temperature and weather
-        if temp > 35:
-            temp_desc = "Very Hot"
-        elif temp > 30:
-            temp_desc = "Hot"
-        elif temp > 25:
-            temp_desc = "Warm"
-        elif temp > 20:
-            temp_desc = "Pleasant"
-        elif temp > 15:
-            temp_desc = "Cool"
-        elif temp > 10:
-            temp_desc = "Cold"
-        else:
-            temp_desc = "Very Cold"
+        temp_desc = _TEMP_LABELS[bisect.bisect_left(_TEMP_CUTS, temp)]
         
         # Add humidity descriptor if available
         humidity_desc = ""
         if "humidity" in weather_data["main"]:
             humidity = weather_data["main"]["humidity"]
-            if humidity > 80:
-                humidity_desc = " and Humid"
-            elif humidity < 30:
-                humidity_desc = " and Dry"
+            humidity_desc = _HUMIDITY_LABELS[bisect.bisect_right(_HUMIDITY_CUTS, humidity)]
         
         return f"{temp_desc}{humidity_desc} with {description.capitalize()}"
     
     return f"{main} - {description.capitalize()}"
 
-def get_weather_for_location(location: str) -> Dict[str, Any]:
+def _fetch_weather_for_location(location: str) -> Dict[str, Any]:
     """
     Fetch real weather data for a given location from OpenWeatherMap API.
     Falls back to simulated data if API call fails.
-    
+
     Args:
         location: Location name (Indian state or city)
-    
+
     Returns:
         Dictionary containing temperature and condition
     """
     # Early return if API key not set
     if not OPENWEATHER_API_KEY:
-        print("Warning: OpenWeatherMap API key not set. Using fallback data.")
+        logger.warning("OpenWeatherMap API key not set; using fallback data")
         return FALLBACK_WEATHER.get(location, FALLBACK_WEATHER["Default"])
-    
+
+    # Early return if the API recently rejected this location
+    if time.time() - _negative_cache.get(location, 0) < _NEGATIVE_CACHE_TTL_SECONDS:
+        return FALLBACK_WEATHER.get(location, FALLBACK_WEATHER["Default"])
+
     # Map state to city for weather lookup if needed
     city = STATE_TO_CITY.get(location, location)
     
@@ -112,7 +161,7 @@ def get_weather_for_location(location: str) -> Dict[str, Any]:
         }
         
         # Make API request
-        response = requests.get(BASE_URL, params=params)
+        response = _session.get(BASE_URL, params=params, timeout=REQUEST_TIMEOUT)
         
         # Check if request was successful
         if response.status_code == 200:
@@ -132,13 +181,47 @@ def get_weather_for_location(location: str) -> Dict[str, Any]:
                 "timestamp": timestamp
             }
         else:
-            print(f"Weather API error: {response.status_code}. Using fallback data.")
+            logger.warning("Weather API error: %s; using fallback data", response.status_code)
+            _negative_cache[location] = time.time()
             return FALLBACK_WEATHER.get(location, FALLBACK_WEATHER["Default"])
             
-    except Exception as e:
-        print(f"Error fetching weather data: {str(e)}. Using fallback data.")
+    except Exception:
+        logger.exception("Error fetching weather data; using fallback data")
         return FALLBACK_WEATHER.get(location, FALLBACK_WEATHER["Default"])
 
+# Streamlit reruns the whole script on every widget interaction, so without a
+# cache each rerun would redo the ~100-500ms OpenWeatherMap round-trip. With
+# st.cache_data(ttl=600) a repeat query for the same location within 10
+# minutes is a dict lookup. When Streamlit isn't installed (plain scripts,
+# tests), an equivalent module-level TTL dict is used instead.
+try:
+    import streamlit as st
+    _cached_fetch = st.cache_data(ttl=_CACHE_TTL_SECONDS, show_spinner=False)(_fetch_weather_for_location)
+except ImportError:
+    _cached_fetch = None
+    _manual_cache: Dict[str, tuple] = {}  # location -> (timestamp, weather_data)
+
+def get_weather_for_location(location: str) -> Dict[str, Any]:
+    """
+    Cached wrapper around the OpenWeatherMap fetch (10-minute TTL).
+
+    Args:
+        location: Location name (Indian state or city)
+
+    Returns:
+        Dictionary containing temperature and condition
+    """
+    if _cached_fetch is not None:
+        return _cached_fetch(location)
+
+    now = time.time()
+    cached = _manual_cache.get(location)
+    if cached and now - cached[0] < _CACHE_TTL_SECONDS:
+        return cached[1]
+    weather_data = _fetch_weather_for_location(location)
+    _manual_cache[location] = (now, weather_data)
+    return weather_data
+
 # Test function
 if __name__ == "__main__":
     test_locations = ["Delhi", "Mumbai", "Bangalore", "Unknown"]
@@ -1,8 +1,9 @@
-import os
+import hashlib
+import pathlib
 
-# Create a GraphViz DOT file to visualize the graph
-def create_visualization():
-    dot_content = '''
+# The DOT content is a fixed template; building it once at module level means
+# create_visualization only has to compare and (maybe) write it.
+_DOT_CONTENT = '''
 digraph OutfitRecommender {
     // Graph styling
     bgcolor="transparent";
@@ -28,9 +29,15 @@ digraph OutfitRecommender {
 }
 '''
 
-    # Write the DOT file
-    with open('outfit_graph.dot', 'w') as f:
-        f.write(dot_content)
+# Create a GraphViz DOT file to visualize the graph
+def create_visualization():
+    # Skip the disk write when the on-disk file already matches: a short
+    # blake2b digest comparison is cheaper than rewriting the file (and the
+    # metadata churn that comes with it) on every call
+    dot_path = pathlib.Path('outfit_graph.dot')
+    new_hash = hashlib.blake2b(_DOT_CONTENT.encode(), digest_size=8).digest()
+    if not dot_path.exists() or hashlib.blake2b(dot_path.read_bytes(), digest_size=8).digest() != new_hash:
+        dot_path.write_text(_DOT_CONTENT)
     
     print("Created DOT file: outfit_graph.dot")
     print("To generate an image, run: dot -Tpng outfit_graph.dot -o outfit_graph.png")